@@ -1,56 +1,88 @@
+import hashlib
+import json
 import logging
-from typing import Dict, Any, Tuple, List
+import os
+import pickle
+import sys
+from typing import Dict, Any, Tuple, List, Optional
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # libyaml not available, fall back to the pure-Python loader
+    from yaml import SafeLoader
+
 # Import validate_config from modbus_relay
 from modbus_relay import validate_config
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 
+# Validated configurations are cached here, keyed by the config files' path, mtime and size
+# (pickled, so only files owned by the current user and not group/world-writable are loaded)
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'ha-modbus-shutter')
+# Bump whenever validation rules or the shape of the returned configs change
+CACHE_VERSION = 1
+# Accepted 'config_version' major prefixes (the part before the first '.')
+_SUPPORTED_MAJORS = frozenset({'v1'})
+
 class ConfigLoader:
     """Loads and validates configurations."""
 
+    __slots__ = ('cache_dir',)
+
+    def __init__(self, cache_dir: Optional[str] = CACHE_DIR) -> None:
+        """Initialize the loader; pass cache_dir=None to disable the validated-config cache."""
+        self.cache_dir = cache_dir
+
     def load_yaml_file(self, path: str) -> Any:
-        """Load a YAML file and return its contents."""
+        """Load a YAML file and return its contents; files ending in '.json' are parsed as JSON."""
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            with open(path, 'rb') as f:
+                if path.endswith('.json'):
+                    return json.load(f)
+                return yaml.load(f, Loader=SafeLoader)
         except FileNotFoundError:
-            logger.error(f"Configuration file not found: {path}")
+            logger.error("Configuration file not found: %s", path)
             raise
         except yaml.YAMLError as e:
-            logger.error(f"Error parsing YAML file: {path} - {e}")
+            logger.error("Error parsing YAML file: %s - %s", path, e)
+            raise
+        except json.JSONDecodeError as e:
+            logger.error("Error parsing JSON file: %s - %s", path, e)
             raise
         except Exception as e:
-            logger.error(f"Error loading YAML file {path}: {e}")
+            logger.error("Error loading YAML file %s: %s", path, e)
             raise
 
 
     def validate_relay_seq(self, seq: Any, action_name: str, shutter_name: str) -> bool:
         """Validate a single relay_seq list."""
         if not isinstance(seq, list):
-            logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}': 'relay_seq' must be a list.")
+            logger.error("Invalid config for shutter '%s', action '%s': 'relay_seq' must be a list.", shutter_name, action_name)
             return False
         if not seq:
-            logger.warning(f"Config for shutter '{shutter_name}', action '{action_name}': 'relay_seq' is empty.")
+            logger.warning("Config for shutter '%s', action '%s': 'relay_seq' is empty.", shutter_name, action_name)
             # Allow empty sequence for actions that do nothing
             return True
+        # Exact type checks: YAML/JSON loaders never return subclasses, and this rejects booleans.
         for idx, step in enumerate(seq):
-            if not isinstance(step, dict):
-                logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}', step {idx+1}: Each step must be a dictionary.")
+            if type(step) is not dict:
+                logger.error("Invalid config for shutter '%s', action '%s', step %s: Each step must be a dictionary.", shutter_name, action_name, idx+1)
                 return False
-            if 'relay_num' not in step or not isinstance(step['relay_num'], int):
-                logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}', step {idx+1}: Missing or invalid 'relay_num' (must be an integer).")
+            relay_num = step.get('relay_num')
+            if type(relay_num) is not int:
+                logger.error("Invalid config for shutter '%s', action '%s', step %s: Missing or invalid 'relay_num' (must be an integer).", shutter_name, action_name, idx+1)
                 return False
-            if 'delay' not in step or not isinstance(step['delay'], (int, float)):
-                logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}', step {idx+1}: Missing or invalid 'delay' (must be a number).")
+            delay = step.get('delay')
+            if type(delay) is not int and type(delay) is not float:
+                logger.error("Invalid config for shutter '%s', action '%s', step %s: Missing or invalid 'delay' (must be a number).", shutter_name, action_name, idx+1)
                 return False
-            if step['relay_num'] < 1 or step['relay_num'] > 32:
-                 logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}', step {idx+1}: 'relay_num' must be between 1 and 32.")
+            if not 1 <= relay_num <= 32:
+                 logger.error("Invalid config for shutter '%s', action '%s', step %s: 'relay_num' must be between 1 and 32.", shutter_name, action_name, idx+1)
                  return False
-            if step['delay'] < 0:
-                 logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}', step {idx+1}: 'delay' cannot be negative.")
+            if delay < 0:
+                 logger.error("Invalid config for shutter '%s', action '%s', step %s: 'delay' cannot be negative.", shutter_name, action_name, idx+1)
                  return False
         return True
 
@@ -64,15 +96,18 @@ class ConfigLoader:
         required_keys = ['config_version', 'shutters']
         for key in required_keys:
             if key not in full_config:
-                logger.error(f"Shutter configuration must contain '{key}'.")
+                logger.error("Shutter configuration must contain '%s'.", key)
                 return False
 
-        # Validate config version (must start with v1.)
+        # Validate config version (major must be one of _SUPPORTED_MAJORS, e.g. v1.x.x)
         version = full_config.get('config_version', '')
-        if not isinstance(version, str) or not version.startswith('v1.'):
-            logger.error(f"Invalid or unsupported 'config_version': '{version}'. Major version must be '1' (e.g., 'v1.0.0').")
+        major, dot, _ = version.partition('.') if isinstance(version, str) else ('', '', '')
+        if not dot or major not in _SUPPORTED_MAJORS:
+            supported = sorted(_SUPPORTED_MAJORS)
+            logger.error("Invalid or unsupported 'config_version': '%s'. Major version must be one of %s (e.g., '%s.0.0').",
+                         version, ", ".join(f"'{major}'" for major in supported), supported[0])
             return False
-        logger.info(f"Configuration version '{version}' loaded successfully.")
+        logger.info("Configuration version '%s' loaded successfully.", version)
 
         # Validate shutters structure
         shutters = full_config['shutters']
@@ -82,17 +117,17 @@ class ConfigLoader:
 
         for shutter_name, actions in shutters.items():
             if not isinstance(actions, dict):
-                logger.error(f"Invalid config for shutter '{shutter_name}': value must be a dictionary of actions.")
+                logger.error("Invalid config for shutter '%s': value must be a dictionary of actions.", shutter_name)
                 return False
             if not actions:
-                 logger.warning(f"Shutter '{shutter_name}' has no actions defined.")
+                 logger.warning("Shutter '%s' has no actions defined.", shutter_name)
                  continue # Allow shutters with no actions
             for action_name, action_config in actions.items():
                  if not isinstance(action_config, dict):
-                      logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}': value must be a dictionary.")
+                      logger.error("Invalid config for shutter '%s', action '%s': value must be a dictionary.", shutter_name, action_name)
                       return False
                  if 'relay_seq' not in action_config:
-                      logger.error(f"Invalid config for shutter '{shutter_name}', action '{action_name}': missing 'relay_seq'.")
+                      logger.error("Invalid config for shutter '%s', action '%s': missing 'relay_seq'.", shutter_name, action_name)
                       return False
                  if not self.validate_relay_seq(action_config['relay_seq'], action_name, shutter_name):
                      return False # Stop validation on first error in sequence
@@ -110,14 +145,113 @@ class ConfigLoader:
             if not isinstance(shutter_list, list):
                 raise ValueError(f"Invalid group '{group_name}': expected a list of shutter names.")
             if not shutter_list:
-                 logger.warning(f"Group '{group_name}' is empty.")
+                 logger.warning("Group '%s' is empty.", group_name)
                  continue # Allow empty groups
-            for shutter in shutter_list:
-                if shutter not in shutters:
-                    raise ValueError(f"Invalid group '{group_name}': shutter '{shutter}' not defined.")
+            missing = [shutter for shutter in dict.fromkeys(shutter_list) if shutter not in shutters]
+            if missing:
+                names = ", ".join(f"'{shutter}'" for shutter in missing)
+                raise ValueError(f"Invalid group '{group_name}': shutter(s) {names} not defined.")
+
+    def intern_names(self, shutters: Dict[str, Any], groups: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Rebuild validated shutters and groups with interned name and step keys.
+
+        Names decoded from YAML/JSON or unpickled are not interned, so dict lookups
+        against them cannot take CPython's identity fast path. Non-string keys
+        (YAML loads e.g. '101:' as int and 'on:' as bool) are kept as they are.
+        """
+        def intern(key: Any) -> Any:
+            return sys.intern(key) if type(key) is str else key
+
+        shutters = {
+            intern(shutter_name): {
+                intern(action_name): {
+                    intern(key): ([{intern(k): v for k, v in step.items()} for step in value] if key == 'relay_seq' and value else value)
+                    for key, value in action_config.items()
+                }
+                for action_name, action_config in actions.items()
+            }
+            for shutter_name, actions in shutters.items()
+        }
+        groups = {
+            intern(group_name): [intern(shutter) for shutter in shutter_list]
+            for group_name, shutter_list in groups.items()
+        }
+        return shutters, groups
+
+    def _cache_path(self, *paths: str) -> Optional[str]:
+        """Return the cache file path for the given config files, or None if caching is not possible."""
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(f"v{CACHE_VERSION}\n".encode('utf-8'))
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            key.update(f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}\n".encode('utf-8'))
+        return os.path.join(self.cache_dir, key.hexdigest() + '.pkl')
+
+    def _load_cached(self, cache_path: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]:
+        """Load previously validated configurations from the cache, if present.
+
+        Unpickling can run arbitrary code, so the cache is only trusted when the
+        file belongs to the current user and is not writable by group or others.
+        """
+        try:
+            with open(cache_path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+                    logger.warning("Ignoring config cache %s: not owned by this user or writable by others", cache_path)
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug("Ignoring unreadable config cache %s: %s", cache_path, e)
+            return None
+
+    def _store_cached(self, cache_path: str, configs: Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]) -> None:
+        """Atomically write validated configurations to the cache."""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+            with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+                pickle.dump(configs, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug("Could not write config cache %s: %s", cache_path, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def load_modbus_config(self, modbus_config_path: str) -> Dict[str, Any]:
+        """Load and validate only the Modbus configuration (enough for actions that need no shutters)."""
+        try:
+            modbus_config = self.load_yaml_file(modbus_config_path)
+            if not validate_config(modbus_config):
+                raise ValueError("Invalid modbus configuration")
+            return modbus_config
+        except (FileNotFoundError, yaml.YAMLError, json.JSONDecodeError):
+            # Error already logged in load_yaml_file
+            raise
+        except ValueError as e:
+            logger.error("Invalid configuration: %s", e)
+            raise
 
     def load_and_validate_configs(self, modbus_config_path: str, shutter_config_path: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
-        """Load and validate the Modbus and shutter configurations, converting delays to milliseconds."""
+        """Load and validate the Modbus and shutter configurations, converting delays to milliseconds.
+
+        Validated results are cached on disk; unchanged config files skip parsing and validation.
+        """
+        cache_path = self._cache_path(modbus_config_path, shutter_config_path)
+        if cache_path:
+            cached = self._load_cached(cache_path)
+            if cached is not None:
+                logger.debug("Loaded validated configuration from cache %s", cache_path)
+                modbus_config, shutters, groups = cached
+                return (modbus_config, *self.intern_names(shutters, groups))
+
         try:
             modbus_config = self.load_yaml_file(modbus_config_path)
             if not validate_config(modbus_config): # Use imported validate_config
@@ -131,28 +265,30 @@ class ConfigLoader:
             groups = full_config.get('shutter_groups', {})
 
             # Convert delays to milliseconds (int) after validation
+            log_conversions = logger.isEnabledFor(logging.DEBUG)
             for shutter_name, actions in shutters.items():
                 for action_name, action_config in actions.items():
-                    if 'relay_seq' in action_config and action_config['relay_seq']:
-                        for step in action_config['relay_seq']:
-                            # Convert float seconds to int milliseconds
-                            step['delay_ms'] = int(step['delay'] * 1000)
-                            # Optionally remove the old key, or keep it for reference
-                            # del step['delay']
-                            logger.debug(f"Converted delay for {shutter_name}/{action_name}: {step['delay']}s -> {step['delay_ms']}ms")
+                    for step in action_config['relay_seq'] or ():
+                        # Convert float seconds to int milliseconds
+                        step['delay_ms'] = int(step['delay'] * 1000)
+                        if log_conversions:
+                            logger.debug("Converted delay for %s/%s: %ss -> %sms", shutter_name, action_name, step['delay'], step['delay_ms'])
 
 
             self.validate_group_config(groups, shutters)
+            shutters, groups = self.intern_names(shutters, groups)
+            if cache_path:
+                self._store_cached(cache_path, (modbus_config, shutters, groups))
             return modbus_config, shutters, groups
         except FileNotFoundError as e:
             # Error already logged in load_yaml_file
             raise
-        except yaml.YAMLError as e:
+        except (yaml.YAMLError, json.JSONDecodeError) as e:
             # Error already logged in load_yaml_file
             raise
         except ValueError as e:
-            logger.error(f"Invalid configuration: {e}")
+            logger.error("Invalid configuration: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Failed to load and validate configurations: {e}")
+            logger.error("Failed to load and validate configurations: %s", e)
             raise
@@ -3,54 +3,116 @@
 import sys
 import argparse
 import logging
-import time
-from time import sleep
-from typing import Dict, Any, Tuple, List, Optional, Union
-from collections import defaultdict
-import math
-
-from modbus_relay import ModbusRelayClient, ModbusRelayError, validate_config
+import functools
+import heapq
+import itertools
+from time import sleep, monotonic
+from typing import Dict, Any, Tuple, List, Optional, NamedTuple, Callable
+from collections import Counter
+
+from modbus_relay import ModbusRelayClient, ModbusRelayError
 import custom_windows_shutter_constants as constants
 from config_loader import ConfigLoader
 
-# Configure logging and create a module logger
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
+# Create a module logger; logging itself is configured in main()
 logger = logging.getLogger(__name__)
 
 # Define action constants
 ACTION_STOP = 'stop'
 
+# Seconds a successful connection check or transaction stays valid before the socket is probed again
+CONNECTION_CHECK_TTL = 30.0
+
 # Type alias for timeline events: (command, data)
-# command: "on" -> data: List[int] of active relays
+# command: "on" -> data: int bitmask of active relays (bit relay_num - 1)
 # command: "delay" -> data: int milliseconds to wait
-TimelineEvent = Tuple[str, Union[List[int], int]]
+TimelineEvent = Tuple[str, int]
+
+
+def relays_in_mask(relay_mask: int) -> List[int]:
+    """Return the relay numbers (1-32) whose bits are set in relay_mask."""
+    return [bit + 1 for bit in range(32) if relay_mask >> bit & 1]
+
+
+class ActionPlan(NamedTuple):
+    """Precomputed relay schedule of one shutter action (times in ms relative to action start)."""
+    relay_events: Tuple[Tuple[int, int, int], ...]  # (start_ms, end_ms, relay_num)
+    duration_ms: int
+
+
+def build_action_plans(shutters: Dict[str, Any]) -> Dict[Tuple[str, str], ActionPlan]:
+    """Precompute an ActionPlan for every (shutter, action) pair of a validated configuration."""
+    plans: Dict[Tuple[str, str], ActionPlan] = {}
+    for shutter_name, actions in shutters.items():
+        for action_name, action_config in actions.items():
+            relay_events: List[Tuple[int, int, int]] = []
+            shutter_local_time_ms = 0
+            for step in action_config.get('relay_seq') or ():
+                relay_num = step['relay_num']
+                end_time_ms = shutter_local_time_ms + step['delay_ms']
+                relay_events.append((shutter_local_time_ms, end_time_ms, relay_num))
+                shutter_local_time_ms = end_time_ms
+            plans[(shutter_name, action_name)] = ActionPlan(tuple(relay_events), shutter_local_time_ms)
+    return plans
+
+def plan_timeline(plan: ActionPlan) -> List[TimelineEvent]:
+    """Build the timeline of a single shutter action directly from its plan (nothing to merge)."""
+    timeline: List[TimelineEvent] = []
+    for start_ms, end_ms, relay_num in plan.relay_events:
+        if end_ms == start_ms:
+            continue  # zero-length step, never visible on the relays
+        state = 1 << (relay_num - 1)
+        if timeline and timeline[-2][1] == state:
+            timeline[-1] = ("delay", timeline[-1][1] + end_ms - start_ms)
+        else:
+            timeline.append(("on", state))
+            timeline.append(("delay", end_ms - start_ms))
+    if timeline:
+        timeline.append(("on", 0))
+    return timeline
 
 class ShutterController:
     """Encapsulates the logic for controlling shutters and groups."""
 
+    __slots__ = ('modbus_config', 'shutters', 'groups', 'action_plans', 'client',
+                 '_conn_checked_at', '_device_address_ok', '_relays_off', '_target_handlers')
+
     def __init__(self, modbus_config: Dict[str, Any], shutters: Dict[str, Any], groups: Dict[str, Any]) -> None:
         """Initialize with Modbus configuration, shutters, and groups."""
         self.modbus_config = modbus_config
         self.shutters = shutters
         self.groups = groups
-        self.client: Optional[ModbusRelayClient] = None
+        self.action_plans = build_action_plans(shutters)
+        self._conn_checked_at = 0.0
+        self._device_address_ok = False
+        self._relays_off = False  # True once this controller has confirmed all relays are off
+        # Target name -> handler(action); shutters take precedence over groups of the same name
+        self._target_handlers: Dict[str, Callable[[str], bool]] = {
+            **{group_name: functools.partial(self.control_group, group_name) for group_name in groups},
+            **{shutter_name: functools.partial(self.control_shutter, shutter_name) for shutter_name in shutters},
+        }
         try:
-            self.client = ModbusRelayClient(modbus_config)
+            self.client: ModbusRelayClient = ModbusRelayClient(modbus_config)
         except Exception as e:
-            logger.error(f"Failed to initialize Modbus client structure: {e}")
+            logger.error("Failed to initialize Modbus client structure: %s", e)
             raise
 
     def _ensure_connected(self) -> bool:
-        """Ensure the client is connected, attempting to connect if necessary."""
-        if not self.client:
-            logger.error("Modbus client not initialized.")
-            return False
+        """Ensure the client is connected, attempting to connect if necessary.
+
+        A successful check, or a successful Modbus transaction since, is trusted for
+        CONNECTION_CHECK_TTL seconds, or until a Modbus error invalidates it.
+        """
+        if self._conn_checked_at and monotonic() - self._conn_checked_at < CONNECTION_CHECK_TTL:
+            return True
         if not self.client.client or not self.client.client.is_socket_open():
             logger.info("Modbus client not connected. Attempting to connect...")
             if not self.client.connect():
                 logger.error("Failed to connect to Modbus device.")
                 return False
             logger.info("Modbus connection successful.")
+            self._device_address_ok = False  # new connection, confirm the device address again
+        self._conn_checked_at = monotonic()
         return True
 
     def __enter__(self):
@@ -59,8 +121,8 @@ class ShutterController:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit method for context management; ensures the Modbus client is closed."""
-        if self.client:
-            self.client.close()
+        # Closing resets the relays unless the last action already left them all off
+        self.client.close(reset=not self._relays_off)
 
     def _generate_group_timeline(self, group_shutters: List[str], action: str) -> List[TimelineEvent]:
         """Generate a sorted timeline based on states at unique time points (milliseconds)."""
@@ -68,279 +130,276 @@ class ShutterController:
             logger.info("Input group is empty. Returning empty timeline.")
             return []
 
+        debug = logger.isEnabledFor(logging.DEBUG)
+
         # 1. Gather Relay Events & Max Duration
         relay_events: List[Tuple[int, int, int]] = []
+        shutter_times_ms: List[List[int]] = []  # per shutter: 0 and each step end, already ascending
         max_shutter_duration_ms = 0
-        logger.info(f"Generating merged timeline for action '{action}' (using milliseconds)...")
-        for shutter_name in group_shutters:
-            logger.debug(f"Processing shutter '{shutter_name}' for merged timeline")
-            if shutter_name not in self.shutters:
-                logger.warning(f"Shutter '{shutter_name}' not found. Skipping.")
+        logger.info("Generating merged timeline for action '%s' (using milliseconds)...", action)
+        merged_schedules = set()  # relay_events already included; identical schedules add nothing to the merge
+        for shutter_name in dict.fromkeys(group_shutters):  # skip duplicate members, keep order
+            if debug:
+                logger.debug("Processing shutter '%s' for merged timeline", shutter_name)
+            plan = self.action_plans.get((shutter_name, action))
+            if plan is None:
+                if shutter_name not in self.shutters:
+                    logger.warning("Shutter '%s' not found. Skipping.", shutter_name)
+                else:
+                    logger.warning("Action '%s' not defined for '%s'. Skipping.", action, shutter_name)
                 continue
-            shutter_config = self.shutters[shutter_name]
-            if action not in shutter_config:
-                logger.warning(f"Action '{action}' not defined for '{shutter_name}'. Skipping.")
+            if not plan.relay_events:
+                logger.info("Action '%s' for '%s' is empty. Skipping.", action, shutter_name)
                 continue
-            action_config = shutter_config[action]
-            relay_seq = action_config.get('relay_seq')
-            if not relay_seq:
-                logger.info(f"Action '{action}' for '{shutter_name}' is empty. Skipping.")
+            if plan.relay_events in merged_schedules:
+                if debug:
+                    logger.debug("  Same relay schedule as an earlier member, already merged.")
                 continue
-            shutter_local_time_ms = 0
-            for step in relay_seq:
-                relay_num = step['relay_num']
-                delay_ms = step['delay_ms']
-                start_time_ms = shutter_local_time_ms
-                end_time_ms = start_time_ms + delay_ms
-                relay_events.append((start_time_ms, end_time_ms, relay_num))
-                logger.debug(f"  Relay {relay_num}: ON at {start_time_ms}ms, OFF at {end_time_ms}ms (relative to shutter start)")
-                shutter_local_time_ms += delay_ms
-            max_shutter_duration_ms = max(max_shutter_duration_ms, shutter_local_time_ms)
+            merged_schedules.add(plan.relay_events)
+            if debug:
+                for start_time_ms, end_time_ms, relay_num in plan.relay_events:
+                    logger.debug("  Relay %s: ON at %sms, OFF at %sms (relative to shutter start)", relay_num, start_time_ms, end_time_ms)
+            relay_events.extend(plan.relay_events)
+            shutter_times_ms.append([0] + [end_time_ms for _, end_time_ms, _ in plan.relay_events])
+            max_shutter_duration_ms = max(max_shutter_duration_ms, plan.duration_ms)
 
         if not relay_events and max_shutter_duration_ms == 0:
             logger.info("No relay events generated and max duration is 0. Returning empty timeline.")
             return []
 
-        # 2. Identify Key Time Points
-        time_points_ms = set([0, max_shutter_duration_ms])
-        for start, end, _ in relay_events:
-            time_points_ms.add(start)
-            time_points_ms.add(end)
-        sorted_times_ms = sorted([t for t in time_points_ms if t >= 0])
-        sorted_times_ms = sorted(list(set(sorted_times_ms)))
-
-        logger.debug(f"Unique time points for merging (ms): {sorted_times_ms}")
-
-        if not sorted_times_ms:
-            if max_shutter_duration_ms == 0:
-                logger.info("Max duration is 0 and no time points identified. Returning empty timeline.")
-                return []
-            else:
-                sorted_times_ms = [0, max_shutter_duration_ms]
-
-        # 3. Calculate State at Each Time Point
-        states_at_time: Dict[int, List[int]] = {}
+        # 2. Identify Key Time Points: merge the per-shutter ascending lists and drop repeats
+        sorted_times_ms = [t_ms for t_ms, _ in itertools.groupby(heapq.merge(*shutter_times_ms))]
+        if debug:
+            logger.debug("Unique time points for merging (ms): %s", sorted_times_ms)
+
+        # 3. Calculate State at Each Time Point (sweep over sorted start/end events)
+        starts = sorted((start, r_num) for start, _, r_num in relay_events)
+        ends = sorted((end, r_num) for _, end, r_num in relay_events)
+        active_counts: Counter = Counter()  # relay -> number of events currently holding it on
+        active_mask = 0
+        states: List[int] = []  # relay mask at each of sorted_times_ms
+        si = ei = 0
         for t_ms in sorted_times_ms:
-            active_relays = set()
-            for start, end, r_num in relay_events:
-                if start <= t_ms < end:
-                    active_relays.add(r_num)
-            states_at_time[t_ms] = sorted(list(active_relays))
-        logger.debug(f"States at time points (ms): {states_at_time}")
-
-        # 4. Build Timeline from States and Durations
+            # Starts first, so zero-length events (start == end) cancel out at the same point
+            while si < len(starts) and starts[si][0] <= t_ms:
+                r_num = starts[si][1]
+                active_counts[r_num] += 1
+                active_mask |= 1 << (r_num - 1)
+                si += 1
+            while ei < len(ends) and ends[ei][0] <= t_ms:
+                r_num = ends[ei][1]
+                active_counts[r_num] -= 1
+                if not active_counts[r_num]:
+                    del active_counts[r_num]
+                    active_mask &= ~(1 << (r_num - 1))
+                ei += 1
+            states.append(active_mask)
+        if debug:
+            logger.debug("States at time points (ms): %s", {t_ms: relays_in_mask(state) for t_ms, state in zip(sorted_times_ms, states)})
+
+        # 4. Build Timeline from States and Durations in a single pass
+        # Consecutive time points are distinct, so every interval has a positive duration.
         timeline: List[TimelineEvent] = []
-        last_added_on_state: Optional[List[int]] = None
-
-        for i in range(len(sorted_times_ms) - 1):
-            t1_ms = sorted_times_ms[i]
-            t2_ms = sorted_times_ms[i+1]
-            state_during_interval = states_at_time[t1_ms]
+        emitted_state: Optional[int] = None
+        for t1_ms, t2_ms, state_during_interval in zip(sorted_times_ms, sorted_times_ms[1:], states):
             duration_ms = t2_ms - t1_ms
+            if state_during_interval != emitted_state:
+                timeline.append(("on", state_during_interval))
+                timeline.append(("delay", duration_ms))
+                emitted_state = state_during_interval
+                if debug:
+                    logger.debug("  Timeline Add: ('on', %s) + ('delay', %s) at %sms", relays_in_mask(state_during_interval), duration_ms, t1_ms)
+            else:
+                timeline[-1] = ("delay", timeline[-1][1] + duration_ms)
+                if debug:
+                    logger.debug("  Timeline Merge Delay: Updated to %sms", timeline[-1][1])
 
-            if duration_ms > 0:
-                state_changed = (last_added_on_state is None or state_during_interval != last_added_on_state)
-
-                if state_changed:
-                    timeline.append(("on", state_during_interval))
-                    last_added_on_state = state_during_interval
-                    logger.debug(f"  Timeline Add: ('on', {state_during_interval}) for interval starting at {t1_ms}ms")
-                    timeline.append(("delay", duration_ms))
-                    logger.debug(f"  Timeline Add: ('delay', {duration_ms})")
-                else:
-                    if timeline and timeline[-1][0] == 'delay':
-                        timeline[-1] = ('delay', timeline[-1][1] + duration_ms)
-                        logger.debug(f"  Timeline Merge Delay: Updated to {timeline[-1][1]}ms")
-                    else:
-                        timeline.append(("delay", duration_ms))
-                        logger.debug(f"  Timeline Add (unexpected): ('delay', {duration_ms})")
-
-        # 5. Final State & Cleanup
-        final_state = states_at_time[sorted_times_ms[-1]]
-        if last_added_on_state is None or final_state != last_added_on_state:
-            if not timeline and final_state != []:
-                timeline.append(("on", final_state))
-                logger.debug(f"  Timeline Add: Initial and final state ('on', {final_state}) at 0ms")
-            elif timeline:
-                timeline.append(("on", final_state))
-                last_added_on_state = final_state
-                logger.debug(f"  Timeline Add: Final state ('on', {final_state}) at {sorted_times_ms[-1]}ms")
-
-        clean_timeline = [evt for evt in timeline if not (evt[0] == 'delay' and evt[1] == 0)]
-
+        # 5. Final State: every relay event ends by max_shutter_duration_ms, so all relays are off
         if max_shutter_duration_ms > 0:
-            if not clean_timeline or clean_timeline[-1] != ('on', []):
-                if clean_timeline and clean_timeline[-1][0] == 'on':
-                    if clean_timeline[-1][1] != []:
-                        logger.debug("Timeline cleanup: Replacing last 'on' state with ('on', [])")
-                        clean_timeline[-1] = ('on', [])
-                elif clean_timeline and clean_timeline[-1][0] == 'delay':
-                    logger.debug("Timeline cleanup: Appending final ('on', []) after delay")
-                    clean_timeline.append(('on', []))
-                elif not clean_timeline:
-                    logger.debug("Timeline cleanup: Adding ('on', []) to empty timeline (max_duration > 0)")
-                    clean_timeline.append(('on', []))
-
-        if clean_timeline and clean_timeline[0][0] == 'delay':
-            logger.warning("Timeline cleanup: Removing unexpected leading delay.")
-            clean_timeline.pop(0)
-
-        if clean_timeline and clean_timeline[0][0] != 'on':
-            logger.warning("Timeline cleanup: First event is not 'on'. Prepending initial state.")
-            initial_state_at_zero = states_at_time.get(0, [])
-            clean_timeline.insert(0, ('on', initial_state_at_zero))
-
-        logger.info(f"Merged timeline generation complete. Events: {len(clean_timeline)}")
-        logger.debug(f"Final Timeline (ms): {clean_timeline}")
-        return clean_timeline
+            timeline.append(("on", 0))
+
+        logger.info("Merged timeline generation complete. Events: %s", len(timeline))
+        if debug:
+            logger.debug("Final Timeline (ms): %s", timeline)
+        return timeline
 
     def _execute_timeline(self, timeline: List[TimelineEvent]) -> bool:
-        """Execute a pre-generated state-based timeline (delays in ms)."""
+        """Execute a pre-generated state-based timeline (delays in ms).
+
+        Delays are scheduled against absolute monotonic deadlines, so Modbus
+        write latency is absorbed into the following delay instead of adding up.
+        The final safety reset is only sent if relays may still be on.
+        """
         if not self._ensure_connected(): return False
-        assert self.client is not None
 
         logger.info("Executing state-based timeline...")
+        self._relays_off = False
         success = True
+        relays_may_be_on = False  # cleared again once an all-off state has been written successfully
         try:
-            logger.debug("Timeline: Performing initial reset.")
-            if not self.client.reset_relays():
-                raise ModbusRelayError("Failed initial reset before timeline execution")
+            # A leading 'on' event writes all 32 coils, which already clears any other relay
+            if not timeline or timeline[0][0] != "on":
+                logger.debug("Timeline: Performing initial reset.")
+                if not self.client.reset_relays():
+                    raise ModbusRelayError("Failed initial reset before timeline execution")
 
+            debug = logger.isEnabledFor(logging.DEBUG)
+            _sleep, _monotonic, write_relays_mask = sleep, monotonic, self.client.write_relays_mask  # bound once for the loop
+            start_time = _monotonic()
+            elapsed_ms = 0  # cumulative scheduled time; kept in integer ms so deadlines do not accumulate float error
             for i, event in enumerate(timeline):
                 command, data = event
-                logger.info(f"Timeline Step {i+1}: Executing {command} with data {data}")
+                if debug:
+                    logger.debug("Timeline Step %d: Executing %s with data %s", i + 1, command, data)
 
                 if command == "delay":
                     if isinstance(data, int) and data > 0:
-                        sleep_seconds = data / 1000.0
-                        logger.debug(f"  Sleeping for {sleep_seconds:.3f} seconds ({data} ms)...")
-                        sleep(sleep_seconds)
+                        elapsed_ms += data
+                        sleep_seconds = start_time + elapsed_ms / 1000.0 - _monotonic()
+                        if debug:
+                            logger.debug("  Sleeping for %.3f seconds (%d ms scheduled)...", sleep_seconds, data)
+                        if sleep_seconds > 0:
+                            _sleep(sleep_seconds)
                 elif command == "on":
-                    if isinstance(data, list):
-                        relay_state_list = [False] * 32
-                        active_relays_str = []
-                        for relay_num in data:
-                            if 1 <= relay_num <= 32:
-                                relay_state_list[relay_num - 1] = True
-                                active_relays_str.append(str(relay_num))
-                            else:
-                                logger.warning(f"  Invalid relay number {relay_num} in 'on' command, skipping.")
-                        logger.debug(f"  Setting relays ON: {', '.join(active_relays_str) if active_relays_str else 'None'}")
-                        if not self.client.write_relays(relay_state_list):
-                            raise ModbusRelayError(f"Timeline: Failed to set relay state {data}")
+                    if isinstance(data, int) and 0 <= data <= 0xFFFFFFFF:
+                        if debug:
+                            logger.debug("  Setting relays ON: %s", ', '.join(map(str, relays_in_mask(data))) or 'None')
+                        relays_may_be_on = True
+                        if not write_relays_mask(data):
+                            raise ModbusRelayError(f"Timeline: Failed to set relay state {relays_in_mask(data)}")
+                        relays_may_be_on = data != 0
                     else:
-                        logger.error(f"  Invalid data type for 'on' command: {type(data)}")
+                        logger.error("  Invalid relay mask for 'on' command: %r", data)
                         raise ValueError("Invalid timeline event data for 'on' command")
 
                 else:
-                    logger.error(f"Timeline: Unknown command '{command}'")
+                    logger.error("Timeline: Unknown command '%s'", command)
                     raise ValueError(f"Unknown timeline command: {command}")
 
             logger.info("Timeline execution completed successfully.")
+            self._conn_checked_at = monotonic()
+            self._relays_off = not relays_may_be_on
 
         except ModbusRelayError as e:
-            logger.error(f"Timeline: Modbus error during execution: {e}")
+            logger.error("Timeline: Modbus error during execution: %s", e)
+            self._conn_checked_at = 0.0
             success = False
         except Exception as e:
-            logger.exception(f"Timeline: Unexpected error during execution: {e}")
+            logger.exception("Timeline: Unexpected error during execution: %s", e)
             success = False
         finally:
-            logger.info("Timeline: Performing final safety reset.")
-            if self.client and self.client.client and self.client.client.is_socket_open():
+            if not relays_may_be_on:
+                logger.debug("Timeline: All relays are known to be off, skipping final safety reset.")
+            elif self.client.client and self.client.client.is_socket_open():
+                logger.info("Timeline: Performing final safety reset.")
                 if not self.client.reset_relays():
                     logger.error("Timeline: Failed to perform final safety reset!")
+                else:
+                    self._relays_off = True
             else:
                 logger.warning("Timeline: Client not connected or available for final safety reset.")
 
         return success
 
+    def control_shutter(self, shutter_name: str, action: str) -> bool:
+        """Control a single shutter; its relay_seq maps to a timeline without the group merge."""
+        logger.info("Controlling single shutter '%s' via timeline for action '%s'", shutter_name, action)
+        plan = self.action_plans.get((shutter_name, action))
+        if plan is None:
+            logger.warning("Action '%s' not defined for '%s'. Skipping.", action, shutter_name)
+            return True
+        timeline = plan_timeline(plan)
+        if not timeline:
+            logger.info("Generated timeline for single shutter '%s', action '%s' is empty.", shutter_name, action)
+            return True
+        return self._execute_timeline(timeline)
+
     def control_group(self, group_name: str, action: str) -> bool:
         """Control a group of shutters using a generated state-based timeline."""
         if group_name not in self.groups:
-            logger.error(f"Group '{group_name}' not found in configuration.")
+            logger.error("Group '%s' not found in configuration.", group_name)
             return False
 
         group_shutters = self.groups[group_name]
         if not group_shutters:
-            logger.warning(f"Group '{group_name}' is empty. Nothing to do.")
+            logger.warning("Group '%s' is empty. Nothing to do.", group_name)
             return True
 
-        logger.info(f"Controlling group '{group_name}' via state-based timeline for action '{action}'...")
+        logger.info("Controlling group '%s' via state-based timeline for action '%s'...", group_name, action)
 
         try:
             timeline = self._generate_group_timeline(group_shutters, action)
         except Exception as e:
-            logger.exception(f"Failed to generate timeline for group '{group_name}', action '{action}': {e}")
+            logger.exception("Failed to generate timeline for group '%s', action '%s': %s", group_name, action, e)
             return False
 
         if not timeline:
-            logger.info(f"Generated timeline for group '{group_name}', action '{action}' is empty. Nothing to execute.")
+            logger.info("Generated timeline for group '%s', action '%s' is empty. Nothing to execute.", group_name, action)
             return True
 
         overall_success = self._execute_timeline(timeline)
 
         if overall_success:
-            logger.info(f"Group '{group_name}' action '{action}' completed via timeline.")
+            logger.info("Group '%s' action '%s' completed via timeline.", group_name, action)
         else:
-            logger.warning(f"Group '{group_name}' action '{action}' failed during timeline execution.")
+            logger.warning("Group '%s' action '%s' failed during timeline execution.", group_name, action)
 
         return overall_success
 
     def check_device_address(self) -> bool:
-        """Check and log the device address."""
+        """Check and log the device address; a confirmed address is not re-read until the next reconnect."""
+        if self._device_address_ok:
+            return True
         if not self._ensure_connected(): return False
-        assert self.client is not None
 
         try:
             resp = self.client.read_device_address()
             if not resp:
                 return False
-            logger.info(f"Slave ID confirmed: {resp.registers}")
+            logger.info("Slave ID confirmed: %s", resp.registers)
+            self._device_address_ok = True
+            self._conn_checked_at = monotonic()
             return True
         except ModbusRelayError as e:
-            logger.error(f"Failed to read device address: {e}")
+            logger.error("Failed to read device address: %s", e)
+            self._conn_checked_at = 0.0
             return False
         except Exception as e:
-            logger.error(f"Unexpected error reading device address: {e}")
+            logger.error("Unexpected error reading device address: %s", e)
             return False
 
     def handle_stop_action(self) -> bool:
         """Handle the stop action by resetting all relays."""
         if not self._ensure_connected(): return False
-        assert self.client is not None
 
         logger.info("Global STOP command received. Resetting all relays.")
         try:
             if not self.client.reset_relays():
                 return False
             logger.info("All relays reset successfully.")
+            self._conn_checked_at = monotonic()
+            self._relays_off = True
             return True
         except ModbusRelayError as e:
-            logger.error(f"Failed to reset relays during STOP action: {e}")
+            logger.error("Failed to reset relays during STOP action: %s", e)
+            self._conn_checked_at = 0.0
             return False
         except Exception as e:
-            logger.error(f"Unexpected error during STOP action: {e}")
+            logger.error("Unexpected error during STOP action: %s", e)
             return False
 
     def handle_action(self, action: str, target: str) -> bool:
-        """Handle a specific action for a shutter or group."""
+        """Handle a specific action for a shutter or group; stop is always global (one reset frame)."""
+        if action == ACTION_STOP:
+            return self.handle_stop_action()
         if not self.check_device_address():
             return False
 
-        if target in self.shutters:
-            logger.info(f"Controlling single shutter '{target}' via timeline for action '{action}'")
-            timeline = self._generate_group_timeline([target], action)
-            if not timeline:
-                logger.info(f"Generated timeline for single shutter '{target}', action '{action}' is empty.")
-                return True
-            return self._execute_timeline(timeline)
-
-        elif target in self.groups:
-            logger.info(f"Controlling shutter group '{target}' via timeline for action '{action}'")
-            return self.control_group(target, action)
-        else:
-            logger.error(f"Error: Unknown shutter or group '{target}'")
+        handler = self._target_handlers.get(target)
+        if handler is None:
+            logger.error("Error: Unknown shutter or group '%s'", target)
             return False
+        return handler(action)
 
 
 def main() -> None:
@@ -350,22 +409,26 @@ def main() -> None:
     parser.add_argument("--shutter_config", type=str, default=constants.SHUTTER_CONFIG_PATH, help="Path to Shutter configuration file (v1.x.x)")
     parser.add_argument("action", type=str, help=f"Action to perform (e.g., 'up', 'down', 'sunA', '{ACTION_STOP}')")
     parser.add_argument("target", nargs='?', help="Shutter or group name (required for all actions except 'stop')")
-    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--debug", "-v", "--verbose", dest="debug", action="store_true", help="Enable debug logging")
 
     args = parser.parse_args()
 
     log_level = logging.DEBUG if args.debug else logging.INFO
-    logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(message)s", force=True)
+    logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(message)s")
 
     if args.action != ACTION_STOP and not args.target:
         parser.error(f"Target shutter or group name required for action '{args.action}'")
     if args.action == ACTION_STOP and args.target:
-        logger.warning(f"Target '{args.target}' ignored for '{ACTION_STOP}' action.")
+        logger.warning("Target '%s' ignored for '%s' action.", args.target, ACTION_STOP)
         args.target = None
 
     try:
         config_loader = ConfigLoader()
-        modbus_config, shutters, groups = config_loader.load_and_validate_configs(args.modbus_config, args.shutter_config)
+        if args.action == ACTION_STOP:
+            # Stop only resets the relays, so the shutter configuration is not needed
+            modbus_config, shutters, groups = config_loader.load_modbus_config(args.modbus_config), {}, {}
+        else:
+            modbus_config, shutters, groups = config_loader.load_and_validate_configs(args.modbus_config, args.shutter_config)
         if 'DEBUG_MODBUS' not in modbus_config:
             modbus_config['DEBUG_MODBUS'] = args.debug
         elif args.debug:
@@ -384,14 +447,14 @@ def main() -> None:
                 success = controller.handle_action(args.action, args.target)
 
             if not success:
-                logger.error(f"Action '{args.action}' failed for target '{args.target}'.")
+                logger.error("Action '%s' failed for target '%s'.", args.action, args.target)
                 exit_code = 1
 
     except ModbusRelayError as e:
-        logger.error(f"Modbus communication error: {e}")
+        logger.error("Modbus communication error: %s", e)
         exit_code = 1
     except Exception as e:
-        logger.exception(f"An unexpected error occurred: {e}")
+        logger.exception("An unexpected error occurred: %s", e)
         exit_code = 1
 
     sys.exit(exit_code)
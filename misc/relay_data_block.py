@@ -2,21 +2,17 @@ __all__ = ["RelayDataBlock"]
 
 from pymodbus.datastore import ModbusSequentialDataBlock
 
-class RelayDataBlock(ModbusSequentialDataBlock):
-    def relay_to_coil(self, relay_num: int) -> int:
-        relay_idx = relay_num - 1
-        return 24 - (relay_idx // 8) * 8 + (relay_idx % 8)
+from modbus_relay import RELAY_COILS
 
+class RelayDataBlock(ModbusSequentialDataBlock):
     def setValues(self, address, values):
         # If writing a single coil within 0-31, apply mapping
         if len(values) == 1 and 0 <= address < 32:
-            phys = self.relay_to_coil(address + 1)
-            self.values[phys] = values[0]
+            self.values[RELAY_COILS[address]] = values[0]
         # If writing 32 values starting at 0, use mapping for block update
+        # (the mapping just reverses the order of the four 8-coil bytes)
         elif address == 0 and len(values) == 32:
-            for i, val in enumerate(values):
-                phys = self.relay_to_coil(i + 1)
-                self.values[phys] = val
+            self.values[0:32] = values[24:32] + values[16:24] + values[8:16] + values[0:8]
         else:
             # ...existing behavior...
             super().setValues(address, values)
@@ -24,14 +20,10 @@ class RelayDataBlock(ModbusSequentialDataBlock):
     def getValues(self, address, count=1):
         # If reading a single coil within 0-31, apply mapping
         if count == 1 and 0 <= address < 32:
-            phys = self.relay_to_coil(address + 1)
-            return [self.values[phys]]
-        # If reading 32 values starting at 0, apply mapping in reverse
+            return [self.values[RELAY_COILS[address]]]
+        # If reading 32 values starting at 0, apply mapping in reverse (its own inverse)
         elif address == 0 and count == 32:
-            result = [False] * 32
-            for i in range(32):
-                phys = self.relay_to_coil(i + 1)
-                result[i] = self.values[phys]
-            return result
+            coils = self.values[0:32]
+            return coils[24:32] + coils[16:24] + coils[8:16] + coils[0:8]
         else:
             return super().getValues(address, count)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import logging
 import signal
 import sys
 from typing import List, Optional, Dict, Any
@@ -12,11 +13,15 @@ from pymodbus import (
 )
 from pymodbus.framer import FramerType
 
+logger = logging.getLogger(__name__)
+
+
+_REQUIRED_CONFIG_KEYS = frozenset({'CONNECTION_TYPE', 'DEVICE_PORT', 'SLAVE_ID'})
+
 
 def validate_config(config: Dict[str, Any]) -> bool:
     """Validate configuration dictionary."""
-    required_keys = ['CONNECTION_TYPE', 'DEVICE_PORT', 'SLAVE_ID']
-    return all(key in config for key in required_keys)
+    return isinstance(config, dict) and _REQUIRED_CONFIG_KEYS.issubset(config)
 
 
 class ModbusRelayError(Exception):
@@ -41,9 +46,16 @@ def handle_modbus_exception(func):
     return wrapper
 
 
+# Coil address of each relay, indexed by relay_num - 1 (see ModbusRelayClient.relay_to_coil)
+RELAY_COILS = tuple(24 - (relay_idx // 8) * 8 + (relay_idx % 8) for relay_idx in range(32))
+# Coil values for each byte value, least significant bit first
+_BYTE_BITS = tuple(tuple(bool((byte >> bit) & 1) for bit in range(8)) for byte in range(256))
+
+
 class ModbusRelayClient:
     """Modbus client for controlling relay board."""
     DeviceAddress = 0x4000  # Device address
+    RELAY_STATES_HEADER = "Relay: " + "".join(f" {relay_num:2d}" for relay_num in range(1, 33))
 
     def __init__(self, config: Dict[str, Any]):
         """Initialize client with config dictionary."""
@@ -61,36 +73,33 @@ class ModbusRelayClient:
     @staticmethod
     def relay_to_coil(relay_num: int) -> int:
         """Convert relay number to coil number.
-        Maps relay numbers 0-31 to coil addresses by reversing byte order:
-        relays 0-7   -> coils 24-31
-        relays 8-15  -> coils 16-23
-        relays 16-23 -> coils 8-15
-        relays 24-31 -> coils 0-7
+        Maps relay numbers 1-32 to coil addresses by reversing byte order:
+        relays 1-8   -> coils 24-31
+        relays 9-16  -> coils 16-23
+        relays 17-24 -> coils 8-15
+        relays 25-32 -> coils 0-7
         """
-        relay_idx = relay_num - 1
-        return 24 - (relay_idx // 8) * 8 + (relay_idx % 8)
+        if not 1 <= relay_num <= 32:
+            raise ValueError(f"Relay number must be between 1 and 32, got {relay_num}")
+        return RELAY_COILS[relay_num - 1]
 
     def display_relay_states(self, relay_states: Optional[List[bool]]) -> None:
         """Display relay states showing both logical and physical numbers."""
         if relay_states is None:
             print("Error: Could not read relay states")
             return
-        s1 = "Relay: "
-        s2 = "State: "
-        for relay_state_idx in range(32):
-            s1 += f" {(relay_state_idx + 1):2d}"
-            s2 += f"  {1 if relay_states[relay_state_idx] else 0}"
-        print(s1)
-        print(s2)
+        if len(relay_states) != 32:
+            logger.warning("Expected 32 relay states, got %d; the State row will not line up with the header", len(relay_states))
+        print(self.RELAY_STATES_HEADER)
+        print("State: " + "".join(["  1" if state else "  0" for state in relay_states[:32]]))
 
     def connect(self) -> bool:
         """Connect to the modbus device."""
         try:
-            print(f"Connecting to Modbus with settings: {self.__dict__}")  # Debugging
+            logger.debug("Connecting to Modbus: type=%s port=%s slave=%s", self.connection_type, self.port, self.slave_id)
             if self.connection_type == "tcp":
-                from pymodbus.client import ModbusTcpClient  # updated import
                 # For simulator, use fixed port 5020
-                self.client = ModbusTcpClient(self.port, port=5020)
+                self.client = ModbusClient.ModbusTcpClient(self.port, port=5020)
             else:
                 self.client = ModbusClient.ModbusSerialClient(
                     self.port,
@@ -102,17 +111,18 @@ class ModbusRelayClient:
                 )
             return self.client.connect()
         except Exception as e:
-            print(f"Connection error: {e}")
+            logger.error("Connection error: %s", e)
             return False
 
-    def close(self) -> None:
-        """Close the connection and reset relays."""
+    def close(self, reset: bool = True) -> None:
+        """Close the connection, resetting relays first unless reset is False."""
         if self.client:
             try:
-                self.reset_relays()
+                if reset:
+                    self.reset_relays()
                 self.client.close()
             except Exception as e:
-                print(f"Error closing connection: {e}")
+                logger.error("Error closing connection: %s", e)
 
     @handle_modbus_exception
     def reset_relays(self) -> Optional[Any]:
@@ -136,13 +146,25 @@ class ModbusRelayClient:
             values: List of 32 boolean values where index 0 is relay 1, index 1 is relay 2, etc.
         """
         coil_values = [False] * 32
-        for relay_state_idx, value in enumerate(values):
-            coil = self.relay_to_coil(relay_state_idx + 1)
+        for coil, value in zip(RELAY_COILS, values):
             coil_values[coil] = value
         if self.client:
             return self.client.write_coils(address=0, values=coil_values, slave=self.slave_id)
         return None
 
+    @handle_modbus_exception
+    def write_relays_mask(self, mask: int) -> Optional[Any]:
+        """Write all relays from a bitmask in a single write_coils request.
+        Args:
+            mask: Relay bitmask where bit 0 is relay 1, bit 1 is relay 2, etc.
+        The relay-to-coil mapping only reverses byte order, so the coil bytes are
+        the mask's bytes in big-endian order.
+        """
+        coil_values = [bit for byte in mask.to_bytes(4, 'big') for bit in _BYTE_BITS[byte]]
+        if self.client:
+            return self.client.write_coils(address=0, values=coil_values, slave=self.slave_id)
+        return None
+
     @handle_modbus_exception
     def read_relay_states(self) -> Optional[List[bool]]:
         """Read all coil states."""
@@ -150,7 +172,7 @@ class ModbusRelayClient:
             resp = self.client.read_coils(address=0, count=32, slave=self.slave_id)
             if resp:
                 bits = resp.bits
-                return [bits[self.relay_to_coil(relay_num)] for relay_num in range(1, 33)]
+                return [bits[coil] for coil in RELAY_COILS]
         return None
 
     @handle_modbus_exception
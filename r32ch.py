@@ -8,12 +8,20 @@ import argparse
 import yaml
 from modbus_relay import ModbusRelayClient, ModbusRelayError, validate_config
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # libyaml not available, fall back to the pure-Python loader
+    from yaml import SafeLoader
+
+# Relay states for the 'all odds' demo step: every odd index on (relays 2, 4, ..., 32)
+ALL_ODDS_ON = [bool(i & 1) for i in range(32)]
+
 
 def load_config(config_path: str) -> Optional[Dict[str, Any]]:
     """Load and validate configuration from the given path."""
     try:
         with open(config_path, 'r', encoding='utf-8') as file:
-            local_config = yaml.safe_load(file)
+            local_config = yaml.load(file, Loader=SafeLoader)
             if not validate_config(local_config):
                 print("Invalid configuration format")
                 return None
@@ -56,8 +64,7 @@ def run_sync_simple_client(config: Dict[str, Any]) -> None:
                 sleep(sleep_time)
 
             print("Write all odds relays to On ...")
-            all_odds_on = [True if i % 2 else False for i in range(32)]
-            client.write_relays(all_odds_on)
+            client.write_relays(ALL_ODDS_ON)
             client.display_relay_states(client.read_relay_states())
             print("")
             sleep(sleep_time * 20)
@@ -1,3 +1,6 @@
+import os
+import random
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call, ANY
 import time
@@ -5,10 +8,10 @@ from typing import List, Union, Tuple
 import logging  # Added import
 
 # Assuming custom_windows_shutter.py is in the same directory or accessible via PYTHONPATH
-from custom_windows_shutter import ShutterController, ModbusRelayError
-
-# Configure basic logging for tests to show logger name and level
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(name)s][%(levelname)s] %(message)s")
+from custom_windows_shutter import ShutterController, ModbusRelayError, ActionPlan
+from config_loader import ConfigLoader
+from modbus_relay import ModbusRelayClient, RELAY_COILS
+from misc.relay_data_block import RelayDataBlock
 
 # Sample configurations for testing
 SAMPLE_MODBUS_CONFIG = {'CONNECTION_TYPE': 'serial', 'DEVICE_PORT': '/dev/null', 'SLAVE_ID': 1}
@@ -25,20 +28,14 @@ SAMPLE_SHUTTERS_RAW = {
         'down': {'relay_seq': [{'relay_num': 5, 'delay': 2.0}]}
     }
 }
-SAMPLE_SHUTTERS = {}
-for s_name, actions in SAMPLE_SHUTTERS_RAW.items():
-    SAMPLE_SHUTTERS[s_name] = {}
-    for a_name, config in actions.items():
-        SAMPLE_SHUTTERS[s_name][a_name] = {}
-        if 'relay_seq' in config:
-            SAMPLE_SHUTTERS[s_name][a_name]['relay_seq'] = []
-            if config['relay_seq']:
-                for step in config['relay_seq']:
-                    new_step = step.copy()
-                    new_step['delay_ms'] = int(step['delay'] * 1000)
-                    SAMPLE_SHUTTERS[s_name][a_name]['relay_seq'].append(new_step)
-            else:
-                SAMPLE_SHUTTERS[s_name][a_name]['relay_seq'] = []
+# Same conversion ConfigLoader applies: add 'delay_ms' to every step
+SAMPLE_SHUTTERS = {
+    s_name: {
+        a_name: {'relay_seq': [{**step, 'delay_ms': int(step['delay'] * 1000)} for step in config['relay_seq']]}
+        for a_name, config in actions.items()
+    }
+    for s_name, actions in SAMPLE_SHUTTERS_RAW.items()
+}
 
 SAMPLE_GROUPS = {
     'group1': ['shutter1', 'shutter2'],
@@ -47,47 +44,51 @@ SAMPLE_GROUPS = {
     'missing_shutter_group': ['shutter1', 'nonexistent']
 }
 
+def mask(*relays: int) -> int:
+    """Relay bitmask as used by timeline 'on' events."""
+    return sum(1 << (relay - 1) for relay in relays)
+
 EXPECTED_TIMELINES = {
     'shutter1-up': {
         'target': ['shutter1'],
         'action': 'up',
         'timeline': [
-            ('on', [1]),
+            ('on', mask(1)),
             ('delay', 1000),
-            ('on', []),
+            ('on', mask()),
         ]
     },
     'shutter2-up': {
         'target': ['shutter2'],
         'action': 'up',
         'timeline': [
-            ('on', [3]),
+            ('on', mask(3)),
             ('delay', 500),
-            ('on', [4]),
+            ('on', mask(4)),
             ('delay', 700),
-            ('on', []),
+            ('on', mask()),
         ]
     },
     'group1-up': {
         'target': ['shutter1', 'shutter2'],
         'action': 'up',
         'timeline': [
-            ('on', [1, 3]),
+            ('on', mask(1, 3)),
             ('delay', 500),
-            ('on', [1, 4]),
+            ('on', mask(1, 4)),
             ('delay', 500),
-            ('on', [4]),
+            ('on', mask(4)),
             ('delay', 200),
-            ('on', []),
+            ('on', mask()),
         ]
     },
     'group2-down': {
         'target': ['shutter1', 'shutter3'],
         'action': 'down',
         'timeline': [
-            ('on', [2, 5]),
+            ('on', mask(2, 5)),
             ('delay', 2000),
-            ('on', []),
+            ('on', mask()),
         ]
     },
     'empty_group-up': {
@@ -99,22 +100,30 @@ EXPECTED_TIMELINES = {
         'target': ['shutter1', 'shutter3'],
         'action': 'up',
         'timeline': [
-            ('on', [1]),
+            ('on', mask(1)),
             ('delay', 1000),
-            ('on', []),
+            ('on', mask()),
         ]
     },
     'empty_sequence-down': {
         'target': ['shutter1', 'shutter2'],
         'action': 'down',
         'timeline': [
-            ('on', [2]),
+            ('on', mask(2)),
             ('delay', 2000),
-            ('on', []),
+            ('on', mask()),
         ]
     }
 }
 
+# Hand-written timeline that does not start with an 'on' write, so the board must be reset first
+DELAY_FIRST_TIMELINE = [
+    ('delay', 100),
+    ('on', mask(1)),
+    ('delay', 1000),
+    ('on', mask()),
+]
+
 def compare_timelines(test_case, generated, expected):
     test_case.assertEqual(len(generated), len(expected), "Timeline lengths differ")
     for i, (gen_evt, exp_evt) in enumerate(zip(generated, expected)):
@@ -124,24 +133,36 @@ def compare_timelines(test_case, generated, expected):
         if gen_cmd == 'delay':
             test_case.assertEqual(gen_data, exp_data, f"Delay mismatch at index {i}")
         elif gen_cmd == 'on':
-            test_case.assertListEqual(sorted(gen_data), sorted(exp_data), msg=f"'On' list mismatch at index {i}")
+            test_case.assertEqual(gen_data, exp_data, f"'On' mask mismatch at index {i}")
         else:
             test_case.fail(f"Unknown command '{gen_cmd}' in generated timeline at index {i}")
 
 
 class TestShutterControllerTimeline(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        """Patch the Modbus client class once for all tests."""
+        cls.mock_modbus_client_patcher = patch('custom_windows_shutter.ModbusRelayClient')
+        cls.MockModbusRelayClientClass = cls.mock_modbus_client_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the class-level patch."""
+        cls.mock_modbus_client_patcher.stop()
+
     def setUp(self):
         """Set up for test methods."""
         # Create a logger specific to this test class
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.mock_modbus_client_patcher = patch('custom_windows_shutter.ModbusRelayClient')
-        self.MockModbusRelayClientClass = self.mock_modbus_client_patcher.start()
+        # Fresh client instance mock per test: drops call history and any side effects set by earlier tests
+        self.MockModbusRelayClientClass.reset_mock(return_value=True, side_effect=True)
         self.mock_client_instance = self.MockModbusRelayClientClass.return_value
         self.mock_client_instance.connect.return_value = True
         self.mock_client_instance.reset_relays.return_value = True
         self.mock_client_instance.write_relay.return_value = True
         self.mock_client_instance.write_relays.return_value = True
+        self.mock_client_instance.write_relays_mask.return_value = True
         self.mock_client_instance.read_relay_states.return_value = [False] * 32
         self.mock_client_instance.client = MagicMock()
         self.mock_client_instance.client.is_socket_open.return_value = True
@@ -149,61 +170,105 @@ class TestShutterControllerTimeline(unittest.TestCase):
         self.controller = ShutterController(SAMPLE_MODBUS_CONFIG, SAMPLE_SHUTTERS, SAMPLE_GROUPS)
         self.controller.client = self.mock_client_instance
 
-    def tearDown(self):
-        """Tear down test methods."""
-        self.mock_modbus_client_patcher.stop()
+    def test_ensure_connected_caches_successful_check(self):
+        socket_probe = self.mock_client_instance.client.is_socket_open
+        self.assertTrue(self.controller._ensure_connected())
+        self.assertTrue(self.controller._ensure_connected())
+        self.assertEqual(socket_probe.call_count, 1)
+
+        self.mock_client_instance.reset_relays.side_effect = ModbusRelayError("bus fault")
+        self.assertFalse(self.controller.handle_stop_action())
+        self.controller._ensure_connected()
+        self.assertEqual(socket_probe.call_count, 2)
+
+    def test_check_device_address_reads_once(self):
+        self.mock_client_instance.read_device_address.return_value = MagicMock(registers=[1])
+        self.assertTrue(self.controller.check_device_address())
+        self.assertTrue(self.controller.check_device_address())
+        self.mock_client_instance.read_device_address.assert_called_once()
+
+    def test_check_device_address_rereads_after_reconnect(self):
+        self.mock_client_instance.read_device_address.return_value = MagicMock(registers=[1])
+        self.assertTrue(self.controller.check_device_address())
+        self.controller._conn_checked_at = 0.0
+        self.mock_client_instance.client.is_socket_open.return_value = False
+        self.assertTrue(self.controller._ensure_connected())
+        self.assertTrue(self.controller.check_device_address())
+        self.assertEqual(self.mock_client_instance.read_device_address.call_count, 2)
+
+    def test_action_plans_precomputed(self):
+        plans = self.controller.action_plans
+        self.assertEqual(plans[('shutter2', 'up')], ActionPlan(((0, 500, 3), (500, 1200, 4)), 1200))
+        self.assertEqual(plans[('shutter2', 'down')], ActionPlan((), 0))
+        self.assertNotIn(('shutter3', 'up'), plans)
 
     def test_timeline_shutter1_up(self):
         name = 'shutter1-up'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
     def test_timeline_shutter2_up(self):
         name = 'shutter2-up'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")více
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
     def test_timeline_group1_up(self):
         name = 'group1-up'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
     def test_timeline_group2_down(self):
         name = 'group2-down'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
     def test_timeline_empty_group_up(self):
         name = 'empty_group-up'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
     def test_timeline_missing_action_up(self):
         name = 'missing_action-up'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
     def test_timeline_empty_sequence_down(self):
         name = 'empty_sequence-down'
         expected_data = EXPECTED_TIMELINES[name]
-        self.logger.debug(f"Testing timeline for {name}: {expected_data}")
+        self.logger.debug("Testing timeline for %s: %s", name, expected_data)
         generated_timeline = self.controller._generate_group_timeline(expected_data['target'], expected_data['action'])
         compare_timelines(self, generated_timeline, expected_data['timeline'])
 
-    @patch('custom_windows_shutter.sleep', return_value=None)
-    def test_execute_timeline_format(self, mock_sleep):
+    def _fake_clock(self, mock_monotonic, mock_sleep):
+        """Drive the patched monotonic() from the patched sleep() so deadlines can be checked."""
+        clock = [0.0]
+        mock_monotonic.side_effect = lambda: clock[0]
+        def fake_sleep(seconds):
+            clock[0] += seconds
+        mock_sleep.side_effect = fake_sleep
+        return clock
+
+    def test_timeline_duplicate_member(self):
+        expected_data = EXPECTED_TIMELINES['shutter1-up']
+        generated_timeline = self.controller._generate_group_timeline(['shutter1', 'shutter1'], 'up')
+        compare_timelines(self, generated_timeline, expected_data['timeline'])
+
+    @patch('custom_windows_shutter.monotonic')
+    @patch('custom_windows_shutter.sleep')
+    def test_execute_timeline_format(self, mock_sleep, mock_monotonic):
+        self._fake_clock(mock_monotonic, mock_sleep)
         sample_timeline_name = 'group1-up'
         timeline_to_execute = EXPECTED_TIMELINES[sample_timeline_name]['timeline']
 
@@ -213,22 +278,16 @@ class TestShutterControllerTimeline(unittest.TestCase):
         expected_modbus_calls = []
         expected_sleep_calls = []
 
-        expected_modbus_calls.append(call.reset_relays())
-
+        # The first 'on' write covers every coil, so no initial reset is sent either
         for cmd, data in timeline_to_execute:
             if cmd == 'on':
-                expected_state = [False] * 32
-                for relay_num in data:
-                    if 1 <= relay_num <= 32:
-                        expected_state[relay_num - 1] = True
-                expected_modbus_calls.append(call.write_relays(expected_state))
+                expected_modbus_calls.append(call.write_relays_mask(data))
             elif cmd == 'delay':
                 if data > 0:
                     expected_sleep_calls.append(call(data / 1000.0))
+        # The timeline ends with all relays off, so no final safety reset is sent
 
-        expected_modbus_calls.append(call.reset_relays())
-
-        actual_modbus_calls = [c for c in self.mock_client_instance.mock_calls if c[0] in ('reset_relays', 'write_relays')]
+        actual_modbus_calls = [c for c in self.mock_client_instance.mock_calls if c[0] in ('reset_relays', 'write_relays_mask')]
 
         self.assertEqual(len(mock_sleep.call_args_list), len(expected_sleep_calls), "Number of sleep calls differ")
         for i, actual_call in enumerate(mock_sleep.call_args_list):
@@ -238,6 +297,63 @@ class TestShutterControllerTimeline(unittest.TestCase):
 
         self.assertEqual(actual_modbus_calls, expected_modbus_calls)
 
+    @patch('custom_windows_shutter.sleep')
+    def test_execute_timeline_initial_reset_only_without_leading_on(self, mock_sleep):
+        # Generated timelines start with 'on', which writes every coil, so no reset is sent
+        self.assertTrue(self.controller.control_shutter('shutter1', 'up'))
+        self.mock_client_instance.reset_relays.assert_not_called()
+
+        self.assertTrue(self.controller._execute_timeline(DELAY_FIRST_TIMELINE))
+        actual_modbus_calls = [c for c in self.mock_client_instance.mock_calls if c[0] in ('reset_relays', 'write_relays_mask')]
+        self.assertEqual(actual_modbus_calls[-3:], [call.reset_relays(), call.write_relays_mask(mask(1)), call.write_relays_mask(mask())])
+        self.mock_client_instance.reset_relays.assert_called_once()
+
+    def test_execute_timeline_failed_initial_reset_not_retried(self):
+        self.mock_client_instance.reset_relays.side_effect = ModbusRelayError("timeout")
+
+        self.assertFalse(self.controller._execute_timeline(DELAY_FIRST_TIMELINE))
+
+        self.mock_client_instance.reset_relays.assert_called_once()
+        self.mock_client_instance.write_relays_mask.assert_not_called()
+
+    @patch('custom_windows_shutter.sleep')
+    def test_close_skips_reset_after_all_off_timeline(self, mock_sleep):
+        with self.controller:
+            pass
+        self.mock_client_instance.close.assert_called_with(reset=True)
+
+        with self.controller:
+            self.assertTrue(self.controller._execute_timeline(EXPECTED_TIMELINES['shutter1-up']['timeline']))
+        self.mock_client_instance.close.assert_called_with(reset=False)
+        self.mock_client_instance.reset_relays.assert_not_called()
+
+    @patch('custom_windows_shutter.sleep')
+    def test_execute_timeline_failed_write_resets_board(self, mock_sleep):
+        self.mock_client_instance.write_relays_mask.side_effect = [True, ModbusRelayError("timeout")]
+
+        self.assertFalse(self.controller._execute_timeline(EXPECTED_TIMELINES['group1-up']['timeline']))
+
+        self.mock_client_instance.reset_relays.assert_called_once()
+
+    @patch('custom_windows_shutter.monotonic')
+    @patch('custom_windows_shutter.sleep')
+    def test_execute_timeline_absorbs_write_latency(self, mock_sleep, mock_monotonic):
+        clock = self._fake_clock(mock_monotonic, mock_sleep)
+        def slow_write(*args, **kwargs):
+            clock[0] += 0.05
+            return True
+        self.mock_client_instance.write_relays_mask.side_effect = slow_write
+        timeline_to_execute = EXPECTED_TIMELINES['group1-up']['timeline']
+
+        success = self.controller._execute_timeline(timeline_to_execute)
+        self.assertTrue(success)
+
+        # Each 'on' write takes 50 ms; the following delay is shortened by the same amount.
+        sleep_args = [c.args[0] for c in mock_sleep.call_args_list]
+        for actual, expected in zip(sleep_args, [0.45, 0.45, 0.15]):
+            self.assertAlmostEqual(actual, expected, places=5)
+        self.assertEqual(len(sleep_args), 3)
+
     @patch('custom_windows_shutter.ShutterController._generate_group_timeline')
     @patch('custom_windows_shutter.ShutterController._execute_timeline')
     def test_control_group_calls_timeline_methods(self, mock_execute, mock_generate):
@@ -255,38 +371,198 @@ class TestShutterControllerTimeline(unittest.TestCase):
 
     @patch('custom_windows_shutter.ShutterController._generate_group_timeline')
     @patch('custom_windows_shutter.ShutterController._execute_timeline')
-    def test_handle_action_calls_group_timeline(self, mock_execute, mock_generate):
+    @patch('custom_windows_shutter.ShutterController.check_device_address', return_value=True)
+    def test_handle_action_calls_group_timeline(self, mock_check, mock_execute, mock_generate):
         group_name = 'group1'
         action = 'up'
         mock_timeline = EXPECTED_TIMELINES[f'{group_name}-{action}']['timeline']
         mock_generate.return_value = mock_timeline
         mock_execute.return_value = True
-        self.controller.check_device_address = MagicMock(return_value=True)
 
         success = self.controller.handle_action(action, group_name)
 
         self.assertTrue(success)
-        self.controller.check_device_address.assert_called_once()
+        mock_check.assert_called_once()
         mock_generate.assert_called_once_with(SAMPLE_GROUPS[group_name], action)
         mock_execute.assert_called_once_with(mock_timeline)
 
     @patch('custom_windows_shutter.ShutterController._generate_group_timeline')
     @patch('custom_windows_shutter.ShutterController._execute_timeline')
-    def test_handle_action_calls_single_shutter_timeline(self, mock_execute, mock_generate):
+    @patch('custom_windows_shutter.ShutterController.check_device_address', return_value=True)
+    def test_handle_action_calls_single_shutter_timeline(self, mock_check, mock_execute, mock_generate):
         shutter_name = 'shutter1'
         action = 'up'
-        mock_timeline = EXPECTED_TIMELINES[f'{shutter_name}-{action}']['timeline']
-        mock_generate.return_value = mock_timeline
+        expected_timeline = EXPECTED_TIMELINES[f'{shutter_name}-{action}']['timeline']
         mock_execute.return_value = True
-        self.controller.check_device_address = MagicMock(return_value=True)
 
         success = self.controller.handle_action(action, shutter_name)
 
         self.assertTrue(success)
-        self.controller.check_device_address.assert_called_once()
-        mock_generate.assert_called_once_with([shutter_name], action)
-        mock_execute.assert_called_once_with(mock_timeline)
+        mock_check.assert_called_once()
+        mock_generate.assert_not_called()
+        mock_execute.assert_called_once_with(expected_timeline)
+
+
+    @patch('custom_windows_shutter.ShutterController._execute_timeline')
+    @patch('custom_windows_shutter.ShutterController.check_device_address', return_value=True)
+    def test_handle_action_unknown_target(self, mock_check, mock_execute):
+        success = self.controller.handle_action('up', 'nonexistent')
+
+        self.assertFalse(success)
+        mock_execute.assert_not_called()
+
+    @patch('custom_windows_shutter.ShutterController._execute_timeline')
+    def test_handle_action_stop_resets_board(self, mock_execute):
+        self.assertTrue(self.controller.handle_action('stop', 'group1'))
+
+        self.mock_client_instance.reset_relays.assert_called_once()
+        mock_execute.assert_not_called()
+
+
+SAMPLE_MODBUS_YAML = "CONNECTION_TYPE: serial\nDEVICE_PORT: /dev/null\nSLAVE_ID: 1\n"
+SAMPLE_SHUTTER_YAML = """\
+config_version: v1.0.0
+shutters:
+  kitchen:
+    up:
+      relay_seq:
+        - {relay_num: 1, delay: 1.5}
+"""
+
+
+class TestConfigLoader(unittest.TestCase):
+
+    def setUp(self):
+        """Write sample config files into a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.modbus_path = self._write('modbus.yaml', SAMPLE_MODBUS_YAML)
+        self.shutter_path = self._write('shutters.yaml', SAMPLE_SHUTTER_YAML)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_non_string_names_are_loaded(self):
+        # YAML 1.1 loads '101' as int and 'on' as bool; neither can be interned
+        self._write('shutters.yaml', SAMPLE_SHUTTER_YAML + "  101:\n    up:\n      relay_seq: []\n"
+                    "shutter_groups:\n  on: [kitchen, 101]\n")
+        _, shutters, groups = ConfigLoader(cache_dir=None).load_and_validate_configs(self.modbus_path, self.shutter_path)
+        self.assertIn(101, shutters)
+        self.assertEqual(groups[True], ['kitchen', 101])
+        self.assertEqual(shutters['kitchen']['up']['relay_seq'][0]['delay_ms'], 1500)
+
+    def test_unsupported_version_lists_supported_majors(self):
+        with self.assertLogs('config_loader', level='ERROR') as logs:
+            self.assertFalse(ConfigLoader(cache_dir=None).validate_shutter_config({'config_version': 'v2.0.0', 'shutters': {}}))
+        self.assertIn("must be one of 'v1' (e.g., 'v1.0.0')", logs.output[0])
+
+    def _cached_loader(self):
+        return ConfigLoader(cache_dir=os.path.join(self.tmp_dir.name, 'cache'))
+
+    def test_cache_hit_skips_parsing(self):
+        expected = self._cached_loader().load_and_validate_configs(self.modbus_path, self.shutter_path)
+        with patch.object(ConfigLoader, 'load_yaml_file') as mock_load:
+            configs = self._cached_loader().load_and_validate_configs(self.modbus_path, self.shutter_path)
+        mock_load.assert_not_called()
+        self.assertEqual(configs, expected)
+
+    def test_cache_invalidated_by_mtime(self):
+        self._cached_loader().load_and_validate_configs(self.modbus_path, self.shutter_path)
+        self._write('shutters.yaml', SAMPLE_SHUTTER_YAML.replace('delay: 1.5', 'delay: 2.5'))
+        st = os.stat(self.shutter_path)
+        os.utime(self.shutter_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        _, shutters, _ = self._cached_loader().load_and_validate_configs(self.modbus_path, self.shutter_path)
+        self.assertEqual(shutters['kitchen']['up']['relay_seq'][0]['delay_ms'], 2500)
+
+    def test_cache_invalidated_by_version_bump(self):
+        self._cached_loader().load_and_validate_configs(self.modbus_path, self.shutter_path)
+        with patch('config_loader.CACHE_VERSION', 2), \
+             patch.object(ConfigLoader, 'load_yaml_file', wraps=self._cached_loader().load_yaml_file) as mock_load:
+            self._cached_loader().load_and_validate_configs(self.modbus_path, self.shutter_path)
+        self.assertEqual(mock_load.call_count, 2)
+
+    def test_unusable_cache_falls_back_to_yaml(self):
+        expected = ConfigLoader(cache_dir=None).load_and_validate_configs(self.modbus_path, self.shutter_path)
+        # Cache dir that cannot be created: a regular file is in the way
+        blocked = ConfigLoader(cache_dir=os.path.join(self.modbus_path, 'cache'))
+        self.assertEqual(blocked.load_and_validate_configs(self.modbus_path, self.shutter_path), expected)
+
+        loader = self._cached_loader()
+        cache_path = loader._cache_path(self.modbus_path, self.shutter_path)
+        os.makedirs(os.path.dirname(cache_path))
+        with open(cache_path, 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertEqual(loader.load_and_validate_configs(self.modbus_path, self.shutter_path), expected)
+
+    def test_cache_writable_by_others_is_ignored(self):
+        loader = self._cached_loader()
+        loader.load_and_validate_configs(self.modbus_path, self.shutter_path)
+        os.chmod(loader._cache_path(self.modbus_path, self.shutter_path), 0o666)
+        with patch('config_loader.pickle.load') as mock_unpickle:
+            loader.load_and_validate_configs(self.modbus_path, self.shutter_path)
+        mock_unpickle.assert_not_called()
+
+
+class TestModbusRelayClient(unittest.TestCase):
+
+    def _written_coils(self, relay_mask):
+        """Return the coil values write_relays_mask sends for relay_mask."""
+        client = ModbusRelayClient(SAMPLE_MODBUS_CONFIG)
+        client.client = MagicMock()
+        client.client.write_coils.return_value = None
+        client.write_relays_mask(relay_mask)
+        client.client.write_coils.assert_called_once_with(address=0, values=ANY, slave=1)
+        return client.client.write_coils.call_args.kwargs['values']
+
+    def test_write_relays_mask_single_relays(self):
+        self.assertEqual(self._written_coils(mask(1)), [coil == 24 for coil in range(32)])
+        self.assertEqual(self._written_coils(mask(25)), [coil == 0 for coil in range(32)])
+        for relay_num in range(1, 33):
+            self.assertEqual(self._written_coils(mask(relay_num)), [coil == RELAY_COILS[relay_num - 1] for coil in range(32)])
+        self.assertEqual(self._written_coils(mask()), [False] * 32)
+
+    def test_write_relays_mask_random_masks(self):
+        rng = random.Random(4)
+        for relay_mask in [rng.getrandbits(32) for _ in range(200)] + [0xFFFFFFFF]:
+            values = self._written_coils(relay_mask)
+            self.assertEqual(len(values), 32)
+            for i in range(32):
+                self.assertEqual(values[RELAY_COILS[i]], bool(relay_mask >> i & 1), f"relay {i + 1}, mask {relay_mask:#010x}")
+
+    def test_relay_data_block_round_trip(self):
+        rng = random.Random(4)
+        block = RelayDataBlock(0, [False] * 100)
+        block.setValues(0, [relay_num == 1 for relay_num in range(1, 33)])
+        self.assertEqual(block.values[:32], [coil == 24 for coil in range(32)])
+        block.setValues(0, [relay_num == 25 for relay_num in range(1, 33)])
+        self.assertEqual(block.values[:32], [coil == 0 for coil in range(32)])
+        for states in [[bool(rng.getrandbits(1)) for _ in range(32)] for _ in range(200)]:
+            block.setValues(0, states)
+            for i in range(32):
+                self.assertEqual(block.values[RELAY_COILS[i]], states[i], f"relay {i + 1}")
+            self.assertEqual(block.getValues(0, 32), states)
+
+    def test_relay_to_coil(self):
+        self.assertEqual(ModbusRelayClient.relay_to_coil(1), 24)
+        self.assertEqual(ModbusRelayClient.relay_to_coil(32), 7)
+        for relay_num in (0, 33):
+            with self.assertRaises(ValueError):
+                ModbusRelayClient.relay_to_coil(relay_num)
+
+    @patch('builtins.print')
+    def test_display_relay_states_warns_on_wrong_length(self, mock_print):
+        client = ModbusRelayClient(SAMPLE_MODBUS_CONFIG)
+        with self.assertNoLogs('modbus_relay', level='WARNING'):
+            client.display_relay_states([True] + [False] * 31)
+        self.assertEqual(mock_print.call_args.args[0], "State:   1" + "  0" * 31)
+        with self.assertLogs('modbus_relay', level='WARNING'):
+            client.display_relay_states([True] * 8)
 
 
 if __name__ == '__main__':
+    # Configure basic logging for tests to show logger name and level
+    logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(name)s][%(levelname)s] %(message)s")
     unittest.main(argv=['first-arg-is-ignored'], exit=False)